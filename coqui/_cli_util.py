@@ -0,0 +1,52 @@
+from datetime import date, datetime
+import json
+import os
+
+
+def json_serial(obj):
+    """JSON serializer for objects not serializable by default json code"""
+
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError("Type %s not serializable" % type(obj))
+
+
+try:
+    import orjson
+
+    def dumps(obj):
+        # orjson serializes datetimes natively, in the same format as json_serial
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+
+    def dumps(obj):
+        return json.dumps(obj, default=json_serial)
+
+
+class PersistedConfig:
+    def __init__(self, path):
+        self._path = os.path.expanduser(path)
+        self._value = None
+        # Read on first use, so that commands which don't need it skip the disk
+        self._loaded = False
+
+    def set(self, value):
+        self._value = value
+        self._loaded = True
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        with open(self._path, "w") as fout:
+            json.dump(value, fout, indent=2)
+
+    def get(self):
+        if not self._loaded:
+            self._value = self._read()
+            self._loaded = True
+        return self._value
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return None
+
+        with open(self._path) as fin:
+            return json.load(fin)
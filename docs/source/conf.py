@@ -3,6 +3,14 @@
 # For the full list of built-in configuration values, see the documentation:
 # https://www.sphinx-doc.org/en/master/usage/configuration.html
 
+import glob
+import importlib
+import os
+import pickle
+
+from sphinx.errors import ConfigError
+from sphinx_immaterial.apidoc import apigen_utils
+
 # -- Project information -----------------------------------------------------
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#project-information
 
@@ -22,7 +30,11 @@ python_apigen_modules = {
     "coqui": "generated/api/",
 }
 
-templates_path = ["_templates"]
+# Only list directories that exist, Sphinx warns about missing ones
+_conf_dir = os.path.dirname(os.path.abspath(__file__))
+templates_path = [
+    d for d in ["_templates"] if os.path.isdir(os.path.join(_conf_dir, d))
+]
 exclude_patterns = []
 
 
@@ -30,4 +42,57 @@ exclude_patterns = []
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#options-for-html-output
 
 html_theme = "sphinx_immaterial"
-html_static_path = ["_static"]
+html_static_path = [d for d in ["_static"] if os.path.isdir(os.path.join(_conf_dir, d))]
+
+
+# -- Build environment caching -----------------------------------------------
+# Sphinx only reuses the environment of a previous build if every config value
+# can be pickled, otherwise each build starts from scratch. Refer to functions by
+# "module.function" name and import them where they are used instead.
+
+
+def _check_config_picklable(app, config):
+    for item in config:
+        try:
+            pickle.dumps(item.value)
+        except Exception as e:
+            raise ConfigError(f"Config value {item.name!r} can't be pickled: {e}")
+
+
+# apigen deletes and rewrites all generated pages on every build, so Sphinx would
+# see all of them as changed and re-read them. Restore the modification times of
+# pages whose content didn't change, to keep rebuilds incremental. Pages only
+# reference the documented objects, so they must still be re-read when the
+# documented modules change.
+_write_generated_files = apigen_utils.GeneratedDocumentWriter.write_files
+
+
+def _write_generated_files_if_changed(self, entities):
+    modules_mtime = max(
+        os.stat(importlib.import_module(name).__file__).st_mtime_ns
+        for name in self.app.config.python_apigen_modules
+    )
+    previous = {}
+    for output_prefix in self.output_prefixes:
+        pattern = os.path.join(self.app.srcdir, output_prefix + "*.rst")
+        for path in glob.glob(pattern, recursive=True):
+            with open(path, "rb") as fin:
+                previous[path] = (fin.read(), os.stat(path))
+
+    _write_generated_files(self, entities)
+
+    for path, (content, stat) in previous.items():
+        if not os.path.exists(path):
+            continue
+        if stat.st_mtime_ns < modules_mtime:
+            continue
+        with open(path, "rb") as fin:
+            if fin.read() == content:
+                os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+apigen_utils.GeneratedDocumentWriter.write_files = _write_generated_files_if_changed
+
+
+def setup(app):
+    app.connect("config-inited", _check_config_picklable)
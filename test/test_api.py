@@ -0,0 +1,310 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import re
+import threading
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from gql import gql
+from gql.transport.exceptions import TransportServerError
+import pytest
+
+from coqui import Coqui, SynthesisError
+
+VOICE = {
+    "id": "v1",
+    "name": "voice",
+    "samples_count": 1,
+    "created_at": "2022-06-14T20:15:33.016Z",
+}
+SAMPLE = {
+    "id": "s1",
+    "name": "sample",
+    "text": "hello",
+    "created_at": "2022-06-14T20:15:33.016Z",
+    "audio_url": "https://example.com/sample.wav",
+}
+
+
+def _make_app(queries, *, server_apq=False):
+    """Returns a fake GraphQL API, which records the queries it receives"""
+    known_queries = {}
+
+    async def graphql(request):
+        body = await request.json()
+        if isinstance(body, list):
+            results = []
+            for operation in body:
+                queries.append(operation["query"])
+                results.append({"data": resolve(operation["query"])})
+            return web.json_response(results)
+
+        query = body.get("query")
+        queries.append(query)
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+        if server_apq and persisted:
+            if query is None:
+                query = known_queries.get(persisted["sha256Hash"])
+                if query is None:
+                    error = {"message": "PersistedQueryNotFound"}
+                    return web.json_response({"errors": [error]})
+            else:
+                known_queries[persisted["sha256Hash"]] = query
+        elif query is None:
+            error = {"message": "Must provide query string."}
+            return web.json_response({"errors": [error]}, status=400)
+
+        data = resolve(query)
+        if data is None:
+            return web.json_response({"errors": [{"message": "unexpected query"}]})
+        return web.json_response({"data": data})
+
+    def resolve(query):
+        if "profile" in query:
+            return {"profile": {"email": "user@example.com"}}
+        elif "voices" in query:
+            return {"voices": [VOICE]}
+        elif "SamplesBatch" in query:
+            return {alias: [SAMPLE] for alias in re.findall(r"(\w+): samples", query)}
+        elif "samples" in query:
+            return {"samples": [SAMPLE]}
+        elif "createSample" in query:
+            pending = {**SAMPLE, "audio_url": None}
+            return {"createSample": {"errors": None, "sample": pending}}
+        elif "sample(" in query:
+            return {"sample": {**SAMPLE, "audio_url": None}}
+        return None
+
+    app = web.Application()
+    app.router.add_post("/api/v1", graphql)
+    return app
+
+
+async def _serve(coro, *, persisted_queries=False, server_apq=False):
+    """Runs `coro` against a fake GraphQL API, returns its result and the queries"""
+    queries = []
+    Coqui.clear_validation_cache()
+    app = _make_app(queries, server_apq=server_apq)
+    async with TestServer(app) as server:
+        base_url = str(server.make_url(""))
+        async with Coqui(base_url, persisted_queries=persisted_queries) as coqui:
+            assert await coqui.login("token")
+            return await coro(coqui), queries
+
+
+@pytest.fixture
+def threaded_api():
+    """Serves the fake API from another thread, for tests running several loops"""
+    queries = []
+    loop = asyncio.new_event_loop()
+    server = TestServer(_make_app(queries), loop=loop)
+    loop.run_until_complete(server.start_server())
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    Coqui.clear_validation_cache()
+    yield str(server.make_url("")), queries
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_read_results_are_cached():
+    async def run(coqui):
+        voices = await coqui.cloned_voices()
+        assert await coqui.cloned_voices() == voices
+        await coqui.list_samples("v1")
+        await coqui.list_samples("v1")
+
+    _, queries = asyncio.run(_serve(run))
+    # login, voices and samples
+    assert len(queries) == 3
+
+
+def test_invalidate_cache():
+    async def run(coqui):
+        await coqui.cloned_voices()
+        coqui.invalidate_cache()
+        await coqui.cloned_voices()
+
+    _, queries = asyncio.run(_serve(run))
+    assert len(queries) == 3
+
+
+def test_voices_with_samples_uses_one_samples_request():
+    async def run(coqui):
+        return await coqui.voices_with_samples()
+
+    result, queries = asyncio.run(_serve(run))
+    assert [(v.id, [s.id for s in samples]) for v, samples in result] == [
+        ("v1", ["s1"])
+    ]
+    # login, voices and the batched samples
+    assert len(queries) == 3
+
+
+def test_samples_for_voices():
+    async def run(coqui):
+        return await coqui.samples_for_voices(["v1", "v2"])
+
+    result, _ = asyncio.run(_serve(run))
+    assert [[s.id for s in samples] for samples in result] == [["s1"], ["s1"]]
+
+
+def test_validated_token_is_reused_across_instances():
+    async def run(coqui):
+        async with Coqui(base_url=coqui._base_url) as other:
+            assert await other.login("token")
+            assert other.is_logged_in
+
+    _, queries = asyncio.run(_serve(run))
+    assert len(queries) == 1
+
+
+def test_login_without_token():
+    async def run(coqui):
+        async with Coqui(base_url=coqui._base_url) as other:
+            assert not await other.login(None)
+            assert not await other.login_cached("", validated_at=time.time())
+            assert not other.is_logged_in
+
+    _, queries = asyncio.run(_serve(run))
+    assert len(queries) == 1
+
+
+def test_persisted_queries():
+    async def run(coqui):
+        await coqui.cloned_voices()
+        coqui.invalidate_cache()
+        await coqui.cloned_voices()
+
+    _, queries = asyncio.run(_serve(run, persisted_queries=True, server_apq=True))
+    # Each query is sent in full once, after the server didn't recognize its hash
+    assert [q is None for q in queries] == [True, False, True, False, True]
+
+
+def test_persisted_queries_unsupported_by_server():
+    async def run(coqui):
+        await coqui.cloned_voices()
+        return coqui._persisted_queries
+
+    enabled, queries = asyncio.run(_serve(run, persisted_queries=True))
+    assert not enabled
+    assert [q is None for q in queries] == [True, False, False]
+
+
+def test_persisted_mutation_not_resent_after_server_error():
+    requests = []
+
+    async def graphql(request):
+        requests.append(await request.json())
+        return web.Response(status=502, text="Bad Gateway")
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/api/v1", graphql)
+        async with TestServer(app) as server:
+            base_url = str(server.make_url(""))
+            async with Coqui(base_url, persisted_queries=True) as coqui:
+                await coqui.login_cached("token", validated_at=time.time())
+                with pytest.raises(TransportServerError):
+                    await coqui.synthesize("v1", "hello", 1.0, "sample")
+                return coqui._persisted_queries
+
+    assert asyncio.run(run())
+    assert len(requests) == 1
+    assert "query" not in requests[0]
+
+
+def test_batch_execute():
+    async def run(coqui):
+        return await coqui.batch_execute(
+            [
+                (gql("query { profile { email } }"), None),
+                (gql("query { voices { id } }"), None),
+            ]
+        )
+
+    result, queries = asyncio.run(_serve(run))
+    assert result == [{"profile": {"email": "user@example.com"}}, {"voices": [VOICE]}]
+    # login, then both operations of the batch
+    assert len(queries) == 3
+
+
+def test_login_cached_skips_recent_validation():
+    async def run(coqui):
+        async with Coqui(base_url=coqui._base_url) as other:
+            assert await other.login_cached("other", validated_at=time.time() - 10)
+            assert other.is_logged_in
+        async with Coqui(base_url=coqui._base_url) as other:
+            assert await other.login_cached("other", validated_at=time.time() - 600)
+            return other.validated_at
+
+    validated_at, queries = asyncio.run(_serve(run))
+    assert validated_at > time.time() - 60
+    # login, then only the validation of the stale token
+    assert len(queries) == 2
+
+
+def test_synthesize_timeout():
+    async def run(coqui):
+        with pytest.raises(SynthesisError):
+            await coqui.synthesize("v1", "hello", 1.0, "sample", timeout=0.1)
+
+    _, queries = asyncio.run(_serve(run))
+    assert any("sample(" in q for q in queries)
+
+
+def test_sessions_are_rebuilt_on_new_loop(threaded_api):
+    base_url, queries = threaded_api
+    coqui = Coqui(base_url)
+    assert asyncio.run(coqui.login("token"))
+    voices = asyncio.run(coqui.cloned_voices())
+    assert [s.id for s in voices[0].samples()] == ["s1"]
+    coqui.close_sync()
+    # login, voices and samples
+    assert len(queries) == 3
+
+
+def test_sync_sessions_are_not_reused_by_async_api(threaded_api):
+    base_url, queries = threaded_api
+    coqui = Coqui(base_url)
+    assert coqui.login_sync("token")
+    # The sessions opened on the synchronous API's loop can't be used here
+    assert [v.id for v in asyncio.run(coqui.cloned_voices())] == ["v1"]
+    coqui.invalidate_cache()
+    assert [v.id for v in coqui.cloned_voices_sync()] == ["v1"]
+    coqui.close_sync()
+    assert len(queries) == 3
+
+
+def test_sync_api_from_several_threads(threaded_api):
+    base_url, _ = threaded_api
+
+    def run(_):
+        with Coqui(base_url) as coqui:
+            assert coqui.login_sync("token")
+            return [v.id for v in coqui.cloned_voices_sync()]
+
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(run, range(8))) == [["v1"]] * 8
+
+
+def test_instance_shared_by_loops_in_several_threads(threaded_api):
+    base_url, _ = threaded_api
+    coqui = Coqui(base_url, cache_ttl=0)
+    assert coqui.login_sync("token")
+
+    def run(_):
+        async def list_samples():
+            for _ in range(5):
+                assert [s.id for s in await coqui.list_samples("v1")] == ["s1"]
+
+        asyncio.run(list_samples())
+
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(run, range(8)))
+    coqui.close_sync()
+    # The sessions of loops closed since were closed too
+    assert not coqui._loop_sessions
@@ -0,0 +1,173 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from coqui import Coqui, Sample
+
+AUDIO = b"RIFF" + bytes(range(256)) * 1024
+
+
+async def _serve(coro):
+    async def audio(request):
+        return web.Response(body=AUDIO)
+
+    async def numbered(request):
+        return web.Response(body=request.match_info["n"].encode() * 100)
+
+    app = web.Application()
+    app.router.add_get("/sample.wav", audio)
+    app.router.add_get("/samples/{n}.wav", numbered)
+    async with TestServer(app) as server:
+        return await coro(str(server.make_url("")))
+
+
+def test_download_file_streams_whole_response():
+    async def download(base_url):
+        fout = io.BytesIO()
+        await Coqui.download_file(f"{base_url}/sample.wav", fout, 1000)
+        return fout.getvalue()
+
+    assert asyncio.run(_serve(download)) == AUDIO
+
+
+def test_download_file_raises_on_http_error():
+    async def download(base_url):
+        await Coqui.download_file(f"{base_url}/missing.wav", io.BytesIO())
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(_serve(download))
+
+
+def test_download_many_writes_each_destination(tmp_path):
+    buffer = io.BytesIO()
+
+    async def download(base_url):
+        async with Coqui() as coqui:
+            jobs = [
+                (f"{base_url}/samples/{n}.wav", tmp_path / f"{n}.wav") for n in range(5)
+            ]
+            jobs.append((f"{base_url}/samples/9.wav", buffer))
+            await coqui.download_many(jobs, concurrency=2)
+
+    asyncio.run(_serve(download))
+    for n in range(5):
+        assert (tmp_path / f"{n}.wav").read_bytes() == str(n).encode() * 100
+    assert buffer.getvalue() == b"9" * 100
+
+
+def test_download_many_rejects_zero_concurrency():
+    async def download():
+        async with Coqui() as coqui:
+            await coqui.download_many(
+                [("https://example.com/sample.wav", io.BytesIO())], concurrency=0
+            )
+
+    with pytest.raises(ValueError):
+        asyncio.run(download())
+
+
+def test_sample_downloads_through_its_coqui_instance():
+    async def download(base_url):
+        async with Coqui() as coqui:
+            sample = Sample(
+                id="s1",
+                name="sample",
+                text="hello",
+                created_at="2022-06-14T20:15:33.016Z",
+                audio_url=f"{base_url}/sample.wav",
+                _manager=coqui,
+            )
+            fout = io.BytesIO()
+            await sample.download(fout)
+            sessions = coqui._loop_sessions[asyncio.get_running_loop()]
+            assert sessions.download_session is not None
+            return fout.getvalue()
+
+    assert asyncio.run(_serve(download)) == AUDIO
+
+
+def test_download_file_to_os_file(tmp_path):
+    async def download(base_url):
+        with open(tmp_path / "sample.wav", "wb") as fout:
+            await Coqui.download_file(f"{base_url}/sample.wav", fout, 1000)
+
+    asyncio.run(_serve(download))
+    assert (tmp_path / "sample.wav").read_bytes() == AUDIO
+
+
+def test_download_samples_names_files_after_ids(tmp_path):
+    async def download(base_url):
+        samples = [
+            Sample(
+                id=f"s{n}",
+                name="sample",
+                text="hello",
+                created_at="2022-06-14T20:15:33.016Z",
+                audio_url=f"{base_url}/samples/{n}.wav",
+            )
+            for n in range(3)
+        ]
+        async with Coqui() as coqui:
+            return await coqui.download_samples(samples, tmp_path / "out")
+
+    paths = asyncio.run(_serve(download))
+    assert [p.name for p in paths] == ["s0.wav", "s1.wav", "s2.wav"]
+    assert paths[2].read_bytes() == b"2" * 100
+
+
+def test_sync_downloads_from_several_threads():
+    coqui = Coqui()
+
+    def download(base_url, n):
+        url = f"{base_url}/samples/{n}.wav"
+        fout = io.BytesIO()
+        if n % 2:
+            sample = Sample(
+                id=f"s{n}",
+                name="sample",
+                text="hello",
+                created_at="2022-06-14T20:15:33.016Z",
+                audio_url=url,
+                _manager=coqui,
+            )
+            sample.download_sync(fout)
+        else:
+            Coqui.download_file_sync(url, fout)
+        return fout.getvalue()
+
+    async def download_all(base_url):
+        # The sync downloads block their threads, not the server's loop
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(4) as executor:
+            return await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, download, base_url, n)
+                    for n in range(8)
+                )
+            )
+
+    assert asyncio.run(_serve(download_all)) == [
+        str(n).encode() * 100 for n in range(8)
+    ]
+    coqui.close_sync()
+
+
+def test_replaced_sample_downloads():
+    async def download(base_url):
+        sample = Sample(
+            id="s1",
+            name="sample",
+            text="hello",
+            created_at="2022-06-14T20:15:33.016Z",
+            audio_url="https://example.com/sample.wav",
+        )
+        fout = io.BytesIO()
+        await sample._replace(audio_url=f"{base_url}/sample.wav").download(fout)
+        return fout.getvalue()
+
+    assert asyncio.run(_serve(download)) == AUDIO
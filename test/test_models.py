@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from coqui import ClonedVoice, Sample
+
+
+def test_cloned_voice_parses_timestamp():
+    voice = ClonedVoice(id="v", name="voice", created_at="2022-06-14T20:15:33.016Z")
+    assert voice.created_at == datetime(2022, 6, 14, 20, 15, 33, 16000)
+    assert voice.created_at.tzinfo is None
+
+
+def test_sample_parses_timestamp():
+    sample = Sample(
+        id="s",
+        name="sample",
+        text="hello",
+        created_at="2022-06-14T20:15:33.016Z",
+        audio_url="https://example.com/sample.wav",
+    )
+    assert sample.created_at == datetime(2022, 6, 14, 20, 15, 33, 16000)
+    assert sample.created_at.tzinfo is None
+
+
+def test_cloned_voice_fields():
+    voice = ClonedVoice(
+        id="v", name="voice", samples_count=3, created_at="2022-06-14T20:15:33.016Z"
+    )
+    assert voice.samples_count == 3
+    assert voice._asdict()["samples_count"] == 3
+
+
+def test_from_api_matches_constructor():
+    voice = {"id": "v", "name": "voice", "created_at": "2022-06-14T20:15:33.016Z"}
+    assert ClonedVoice._from_api(voice, None) == ClonedVoice(**voice)
+
+    sample = {
+        "id": "s",
+        "name": "sample",
+        "text": "hello",
+        "created_at": "2022-06-14T20:15:33.016Z",
+        "audio_url": "https://example.com/sample.wav",
+    }
+    assert Sample._from_api(sample, None) == Sample(**sample)
+
+
+def test_cloned_voice_without_coqui_instance():
+    voice = ClonedVoice(id="v", name="voice", created_at="2022-06-14T20:15:33.016Z")
+    with pytest.raises(RuntimeError):
+        voice._replace(name="renamed").samples()
@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 import pytest
 
 # pytest forces us to redefine the `mock` global function as a parameter of
@@ -5,20 +7,18 @@ import pytest
 # globally in this file.
 # pylint: disable=redefined-outer-name
 
+Mock = namedtuple("Mock", "what")
+WHAT = "fixture?!?"
 
-@pytest.fixture
-def mock():
-    # Setup
-    my_obj = {"what": "fixture?!?"}
-
-    # Yield the ready to be used fixture object
-    yield my_obj
 
-    # Cleanup
-    # my_obj.clean_resources()
+@pytest.fixture(scope="session")
+def mock():
+    # Nothing to clean up, switch to `yield` once there is
+    return Mock(what=WHAT)
 
 
-def test_something(mock):
+@pytest.mark.parametrize("field,expected", [("what", WHAT)])
+def test_something(mock, field, expected):
     # response = mock.do_something()
     # assert response == "expectation"
-    assert mock["what"] == "fixture?!?"
+    assert getattr(mock, field) == expected